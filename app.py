@@ -3,6 +3,9 @@ from flask_cors import CORS
 from routes import register_routes
 
 app = Flask(__name__, static_folder='dist')
+# Send compact JSON even though the server runs with debug=True (which
+# otherwise pretty-prints every response, including the full mappings list)
+app.json.compact = True
 CORS(app)
 
 # Register all routes
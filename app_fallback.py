@@ -3,7 +3,7 @@ import json
 import hashlib
 from datetime import datetime
 from pathlib import Path
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response
 from flask_cors import CORS
 
 app = Flask(__name__, static_folder='dist')
@@ -579,7 +579,11 @@ def export_mappings():
                 csv_lines.append(f'"{file_path}","{base}","{rev}","{mapping_data}"')
             else:
                 csv_lines.append(f'"{file_path}","","","{mapping_data}"')
-    return jsonify({'csv': '\n'.join(csv_lines)})
+    return Response(
+        '\n'.join(csv_lines),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=vendor_part_mappings.csv'}
+    )
 
 @app.route('/api/generate-files-with-part-numbers', methods=['POST'])
 def generate_files_with_part_numbers():
@@ -1,109 +1,106 @@
 import os
+import sys
 import hashlib
-import re
+from functools import lru_cache
 
+# Empty MD5 state, copied per hash instead of constructing a new hasher each time
+_MD5_INITIAL = hashlib.md5()
+
+def get_file_stem(file_path):
+    """Get filename without directory or extension (same as splitext(basename(path))[0])"""
+    sep_index = file_path.rfind(os.sep)
+    if os.altsep:
+        sep_index = max(sep_index, file_path.rfind(os.altsep))
+    name = file_path[sep_index + 1:]
+    dot_index = name.rfind('.')
+    # Leading dots belong to the name, e.g. '.hidden' has no extension
+    if dot_index > 0 and name[:dot_index].lstrip('.'):
+        return name[:dot_index]
+    return name
+
+@lru_cache(maxsize=65536)
 def get_base_filename(file_path):
     """Get base filename without extension for matching files with same name"""
-    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    base_name = get_file_stem(file_path)
     dir_path = os.path.dirname(file_path)
-    return os.path.join(dir_path, base_name) if dir_path else base_name
+    # Interned so the part.sldprt/part.step/... keys of one part share a single string
+    return sys.intern(os.path.join(dir_path, base_name) if dir_path else base_name)
+
+def format_part_number(base, revision):
+    """Build the full 12-digit part number from a 9-digit base and a revision"""
+    return f"{base}{revision:03d}"
 
-def generate_base_part_number(file_path, existing_mappings):
+def hash_base_filename(base_filename):
+    """Hash a base filename to the integer seed for its base part number"""
+    # MD5 is kept on purpose: numbers for files that are not in the mappings yet
+    # must come out the same as they always have, so the hash cannot change
+    # without renumbering every unmapped part
+    md5 = _MD5_INITIAL.copy()
+    md5.update(base_filename.encode())
+    # First 4 digest bytes as a big-endian int == int(hexdigest()[:8], 16)
+    return int.from_bytes(md5.digest()[:4], 'big')
+
+def generate_base_part_number(file_path, existing_mappings, base_filename=None):
     """Generate a unique 9-digit base part number (last 3 digits reserved for revision)"""
-    # Use base filename (without extension) for hash to ensure same part number
-    # for files with same name but different extensions
-    base_filename = get_base_filename(file_path)
-    file_hash = hashlib.md5(str(base_filename).encode()).hexdigest()[:8]
+    if base_filename is None:
+        base_filename = get_base_filename(file_path)
     
-    # Generate a 9-digit base number
-    base_number = int(file_hash, 16) % 1000000000
+    # Generate a 9-digit base number from the base filename (directory and
+    # name without extension), so all formats of a part start from the same
+    # number; the collision probe below compares the same base filename
+    base_number = hash_base_filename(base_filename) % 1000000000
     
     # Ensure uniqueness of base number
     base_str = f"{base_number:09d}"
     
-    # Check if this base number already exists for a different base filename
-    for mapped_path, mapping_data in existing_mappings.items():
-        if isinstance(mapping_data, dict) and mapping_data.get('base') == base_str:
-            mapped_base = get_base_filename(mapped_path)
-            if mapped_base != base_filename:
-                # Collision with different base filename - adjust base number
-                base_number = (base_number + 1) % 1000000000
-                base_str = f"{base_number:09d}"
-                break
+    # Probe forward while this base number belongs to a different base filename
+    owner = existing_mappings.base_owner(base_str)
+    while owner is not None and owner != base_filename:
+        base_number = (base_number + 1) % 1000000000
+        base_str = f"{base_number:09d}"
+        owner = existing_mappings.base_owner(base_str)
     
     return base_str
 
 def get_or_create_part_mapping(file_path, existing_mappings, revision=None):
     """Get existing part mapping or create new one with revision support"""
-
-    base_filename = get_base_filename(file_path)
-    
-    if file_path in existing_mappings:
-        mapping = existing_mappings[file_path]
-        
-        if isinstance(mapping, str):
-            if len(mapping) == 12:
-                base = mapping[:9]
-                rev = int(mapping[9:])
-                mapping = {'base': base, 'revision': rev}
-                existing_mappings[file_path] = mapping
-            else:
-                base = generate_base_part_number(file_path, existing_mappings)
-                mapping = {'base': base, 'revision': 1}
-                existing_mappings[file_path] = mapping
-        else:
-            mapping = existing_mappings[file_path].copy()
-        
-        if revision is not None and revision != mapping.get('revision', 1):
-            mapping['revision'] = revision
+    # Stored mappings are never modified in place, so they are only copied
+    # when the revision changes
+    mapping = existing_mappings.get(file_path)
+    if mapping is not None:
+        if revision is not None and revision != mapping['revision']:
+            mapping = dict(mapping, revision=revision)
             existing_mappings[file_path] = mapping
     else:
-        matching_mapping = None
-        for mapped_path, mapping_data in existing_mappings.items():
-            if get_base_filename(mapped_path) == base_filename:
-                # Found a file with the same base name - use its mapping
-                if isinstance(mapping_data, dict):
-                    matching_mapping = mapping_data.copy()
-                elif isinstance(mapping_data, str) and len(mapping_data) == 12:
-                    # Old format - convert
-                    base = mapping_data[:9]
-                    rev = int(mapping_data[9:])
-                    matching_mapping = {'base': base, 'revision': rev}
-                break
+        # Look for a file with the same base name - use its mapping
+        base_filename = get_base_filename(file_path)
+        mapping = existing_mappings.get_by_base_filename(base_filename)
         
-        if matching_mapping:
-            mapping = matching_mapping.copy()
-            if revision is not None:
-                mapping['revision'] = revision
+        if mapping is not None:
+            if revision is not None and revision != mapping['revision']:
+                mapping = dict(mapping, revision=revision)
             existing_mappings[file_path] = mapping
         else:
-            base = generate_base_part_number(file_path, existing_mappings)
+            base = generate_base_part_number(file_path, existing_mappings, base_filename)
             mapping = {'base': base, 'revision': revision if revision is not None else 1}
             existing_mappings[file_path] = mapping
     
-    # Generate full 12-digit part number
-    full_part_number = f"{mapping['base']}{mapping['revision']:03d}"
-    
-    return mapping, full_part_number
+    return mapping, mapping['full']
+
+def is_part_number(value):
+    """Check if a string is a 12-digit part number"""
+    # A string test, no regex needed
+    return len(value) == 12 and value.isdecimal()
 
-def is_part_number_filename(filename):
-    """Check if filename is a 12-digit part number"""
-    base_name = os.path.splitext(filename)[0]
-    # Check if base name is exactly 12 digits
-    return bool(re.match(r'^\d{12}$', base_name))
+@lru_cache(maxsize=8192)
+def parse_part_number_filename(filename):
+    """Split a 12-digit part number filename into (part_number, base, revision), or None"""
+    part_number = get_file_stem(filename)
+    if not is_part_number(part_number):
+        return None
+    return part_number, part_number[:9], int(part_number[9:])
 
 def find_original_filename_by_part_number(part_number, mappings):
     """Find original filename(s) that have this part number"""
-    original_files = []
-    for mapped_path, mapping_data in mappings.items():
-        if isinstance(mapping_data, dict):
-            base = mapping_data.get('base', '')
-            rev = mapping_data.get('revision', 1)
-            full = f"{base}{rev:03d}"
-            if full == part_number:
-                original_files.append(os.path.basename(mapped_path))
-        elif isinstance(mapping_data, str) and len(mapping_data) == 12:
-            if mapping_data == part_number:
-                original_files.append(os.path.basename(mapped_path))
-    return original_files
+    return [os.path.basename(mapped_path) for mapped_path in mappings.paths_for_part_number(part_number)]
 
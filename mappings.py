@@ -1,72 +1,262 @@
 import os
 import json
-from filename_generator import get_base_filename
+import sqlite3
+import threading
+from contextlib import closing
+from filename_generator import (
+    get_base_filename,
+    format_part_number,
+    parse_part_number_filename,
+    find_original_filename_by_part_number
+)
+
+# Use orjson for faster parsing of the legacy mappings file when it is installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Store mappings between original files and vendor part numbers
+MAPPINGS_DB = 'vendor_part_mappings.db'
+# Mappings file used before the SQLite store, imported when the database is created
 MAPPINGS_FILE = 'vendor_part_mappings.json'
+# Database user_version once the mappings file has been imported
+LEGACY_IMPORTED_VERSION = 1
+
+# Last loaded mappings, reused while the database files are unchanged
+_cache = {'signature': None, 'mappings': None}
+_cache_lock = threading.RLock()
+
+class Mappings(dict):
+    """Vendor part number mappings keyed by file path, with lookup indexes kept in sync"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # base part number -> base filename that owns it
+        self._base_owners = {}
+        # base filename -> first mapped path with that base filename
+        self._paths_by_base_filename = {}
+        # full part number -> mapped paths with that part number (tuples, so
+        # copies can share them); built on first lookup, most requests never need it
+        self._paths_by_full = None
+        # file paths assigned since the last save (dict keeps insertion order)
+        self._changed = {}
+        for file_path, mapping in self.items():
+            self._index(file_path, mapping)
+
+    def __setitem__(self, file_path, mapping):
+        old_mapping = self.get(file_path)
+        if old_mapping is not None and self._paths_by_full is not None:
+            old_full = old_mapping['full']
+            self._paths_by_full[old_full] = tuple(
+                path for path in self._paths_by_full[old_full] if path != file_path
+            )
+        # Keep the full part number on the mapping so readers never reformat it
+        mapping['full'] = format_part_number(mapping['base'], mapping['revision'])
+        super().__setitem__(file_path, mapping)
+        self._index(file_path, mapping)
+        self._changed[file_path] = None
+
+    def _index(self, file_path, mapping):
+        base_filename = get_base_filename(file_path)
+        if mapping['base']:
+            self._base_owners.setdefault(mapping['base'], base_filename)
+        self._paths_by_base_filename.setdefault(base_filename, file_path)
+        if self._paths_by_full is not None:
+            self._paths_by_full[mapping['full']] = self._paths_by_full.get(mapping['full'], ()) + (file_path,)
+
+    def base_owner(self, base):
+        """Get the base filename a base part number is assigned to, if any"""
+        return self._base_owners.get(base)
+
+    def get_by_base_filename(self, base_filename):
+        """Get the mapping of a file with this base filename (any extension), if any"""
+        file_path = self._paths_by_base_filename.get(base_filename)
+        return self[file_path] if file_path is not None else None
+
+    def paths_for_part_number(self, part_number):
+        """Get the mapped paths whose full part number is part_number"""
+        if self._paths_by_full is None:
+            paths_by_full = {}
+            for file_path, mapping in self.items():
+                paths_by_full.setdefault(mapping['full'], []).append(file_path)
+            self._paths_by_full = {full: tuple(paths) for full, paths in paths_by_full.items()}
+        return self._paths_by_full.get(part_number, ())
+
+    def copy(self):
+        """Copy mappings and indexes (mapping dicts are shared, they are never modified in place)"""
+        clone = Mappings.__new__(Mappings)
+        dict.update(clone, self)
+        clone._base_owners = self._base_owners.copy()
+        clone._paths_by_base_filename = self._paths_by_base_filename.copy()
+        clone._paths_by_full = self._paths_by_full.copy() if self._paths_by_full is not None else None
+        clone._changed = {}
+        return clone
+
+    def pop_changes(self):
+        """Get (file_path, mapping) pairs assigned since the last call and reset tracking"""
+        changes = [(file_path, self[file_path]) for file_path in self._changed]
+        self._changed = {}
+        return changes
+
+def legacy_mapping_rows(mappings):
+    """Convert legacy JSON mappings to (file_path, base, revision) rows, migrating old 12-digit strings"""
+    for file_path, mapping in mappings.items():
+        try:
+            if isinstance(mapping, dict):
+                row = (file_path, mapping.get('base', ''), int(mapping.get('revision', 1)))
+            elif isinstance(mapping, str) and len(mapping) == 12:
+                row = (file_path, mapping[:9], int(mapping[9:]))
+            else:
+                continue
+        except (TypeError, ValueError) as e:
+            # One bad entry should not keep the others from being imported
+            print(f"Skipping unreadable legacy mapping for {file_path}: {e}")
+            continue
+        yield row
+
+def read_legacy_mappings():
+    """Read mappings from the JSON file used before the SQLite store"""
+    try:
+        with open(MAPPINGS_FILE, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return {}
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def connect_mappings_db():
+    """Open the mappings database, creating it (and importing the JSON file) if needed"""
+    conn = sqlite3.connect(MAPPINGS_DB)
+    try:
+        # WAL lets requests read while another one is writing; with WAL, NORMAL
+        # sync skips the fsync on every commit and still never corrupts the file
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS mappings ('
+            'file_path TEXT PRIMARY KEY, base TEXT NOT NULL, revision INTEGER NOT NULL)'
+        )
+        # Lookups by part number use the in-memory Mappings indexes, so a SQL index
+        # on base would only slow down every write (dropped from existing files)
+        conn.execute('DROP INDEX IF EXISTS idx_mappings_base')
+        # user_version is set in the same transaction as the imported rows, so
+        # an import that fails (e.g. a truncated JSON file) is retried on the
+        # next connection instead of leaving an empty database behind
+        if conn.execute('PRAGMA user_version').fetchone()[0] < LEGACY_IMPORTED_VERSION:
+            with conn:
+                conn.executemany(
+                    'INSERT OR IGNORE INTO mappings (file_path, base, revision) VALUES (?, ?, ?)',
+                    legacy_mapping_rows(read_legacy_mappings())
+                )
+                conn.execute(f'PRAGMA user_version = {LEGACY_IMPORTED_VERSION}')
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+def get_db_signature():
+    """Get (mtime, size) of the database and its WAL file, which change on every commit"""
+    signature = []
+    for path in (MAPPINGS_DB, MAPPINGS_DB + '-wal'):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+def _get_cached_mappings():
+    """Get the cached mappings, reloading them if the database changed"""
+    with _cache_lock:
+        signature = get_db_signature()
+        if _cache['mappings'] is None or _cache['signature'] != signature:
+            with closing(connect_mappings_db()) as conn:
+                rows = conn.execute('SELECT file_path, base, revision FROM mappings ORDER BY rowid')
+                _cache['mappings'] = Mappings({
+                    file_path: {'base': base, 'revision': revision, 'full': format_part_number(base, revision)}
+                    for file_path, base, revision in rows
+                })
+            _cache['signature'] = signature
+        return _cache['mappings']
 
 def load_mappings():
     """Load existing vendor part number mappings"""
-    if os.path.exists(MAPPINGS_FILE):
-        with open(MAPPINGS_FILE, 'r') as f:
-            return json.load(f)
-    return {}
+    # Callers add to their mappings, so each gets its own copy
+    return _get_cached_mappings().copy()
+
+def load_mappings_readonly():
+    """Load existing vendor part number mappings for reading only (shared, never modify them)"""
+    return _get_cached_mappings()
 
 def save_mappings(mappings):
-    """Save vendor part number mappings"""
-    with open(MAPPINGS_FILE, 'w') as f:
-        json.dump(mappings, f, indent=2)
-
-def check_file_mapping_status(file_path, mappings):
-    """Check if a file has an existing mapping"""
-    # First check exact file path
-    if file_path in mappings:
-        mapping = mappings[file_path]
-        if isinstance(mapping, dict):
-            base = mapping.get('base', '')
-            rev = mapping.get('revision', 1)
-            full = f"{base}{rev:03d}"
-            return {
-                'hasMapping': True,
-                'basePartNumber': base,
-                'revision': rev,
-                'vendorPartNumber': full
-            }
-        elif isinstance(mapping, str) and len(mapping) == 12:
-            # Old format
-            base = mapping[:9]
-            rev = int(mapping[9:])
-            return {
-                'hasMapping': True,
-                'basePartNumber': base,
-                'revision': rev,
-                'vendorPartNumber': mapping
-            }
-    
-    # Check if there's a mapping for a file with the same base name (different extension)
-    base_filename = get_base_filename(file_path)
-    for mapped_path, mapping_data in mappings.items():
-        if get_base_filename(mapped_path) == base_filename:
-            # Found a file with the same base name
-            if isinstance(mapping_data, dict):
-                base = mapping_data.get('base', '')
-                rev = mapping_data.get('revision', 1)
-                full = f"{base}{rev:03d}"
-                return {
-                    'hasMapping': True,
-                    'basePartNumber': base,
-                    'revision': rev,
-                    'vendorPartNumber': full
-                }
-            elif isinstance(mapping_data, str) and len(mapping_data) == 12:
-                base = mapping_data[:9]
-                rev = int(mapping_data[9:])
-                return {
-                    'hasMapping': True,
-                    'basePartNumber': base,
-                    'revision': rev,
-                    'vendorPartNumber': mapping_data
-                }
+    """Save vendor part number mappings that changed since they were loaded"""
+    changes = mappings.pop_changes()
+    if not changes:
+        return
+    rows = [(file_path, mapping['base'], mapping['revision']) for file_path, mapping in changes]
+    with _cache_lock:
+        signature = get_db_signature()
+        with closing(connect_mappings_db()) as conn, conn:
+            # Upsert instead of INSERT OR REPLACE so updated rows keep their rowid (load order)
+            conn.executemany(
+                'INSERT INTO mappings (file_path, base, revision) VALUES (?, ?, ?) '
+                'ON CONFLICT (file_path) DO UPDATE SET base = excluded.base, revision = excluded.revision',
+                rows
+            )
+        # Apply the same changes to the cache unless another process wrote in
+        # between. Readers may still be iterating the cached mappings, so the
+        # changes go into a copy that replaces it.
+        cached = _cache['mappings']
+        if cached is not None and _cache['signature'] == signature:
+            updated = cached.copy()
+            for file_path, mapping in changes:
+                updated[file_path] = mapping
+            updated.pop_changes()
+            _cache['mappings'] = updated
+            _cache['signature'] = get_db_signature()
+        else:
+            _cache['mappings'] = None
+
+def check_file_mapping_status(file_path, mappings, *other_paths):
+    """Check if a file has an existing mapping, under file_path or any of other_paths"""
+    # For each path in turn, check the exact path, then a file with the same
+    # base name (different extension)
+    mapping = None
+    for path in (file_path, *other_paths):
+        mapping = mappings.get(path)
+        if mapping is None:
+            mapping = mappings.get_by_base_filename(get_base_filename(path))
+        if mapping is not None:
+            break
+    if mapping is None:
+        return {'hasMapping': False}
     
-    return {'hasMapping': False}
+    return {
+        'hasMapping': True,
+        'basePartNumber': mapping['base'],
+        'revision': mapping['revision'],
+        'vendorPartNumber': mapping['full']
+    }
 
+def check_renamed_file_status(file_name, mappings):
+    """Check a file named by its 12-digit part number: (mapping status, original filenames), or None for other names"""
+    renamed_part_number = parse_part_number_filename(file_name)
+    if renamed_part_number is None:
+        return None
+    
+    part_number, base, revision = renamed_part_number
+    # Find original filename(s) with this part number
+    original_filenames = find_original_filename_by_part_number(part_number, mappings)
+    # Set mapping status based on found original files
+    if not original_filenames:
+        return {'hasMapping': False}, original_filenames
+    
+    return {
+        'hasMapping': True,
+        'vendorPartNumber': part_number,
+        'basePartNumber': base,
+        'revision': revision
+    }, original_filenames
@@ -5,28 +5,377 @@ import zipfile
 import csv
 import io
 import re
+import time
 from datetime import datetime
 from pathlib import Path
-from flask import request, jsonify, send_from_directory, Response
+from flask import request, jsonify, send_file, send_from_directory, Response, stream_with_context
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill
-from collections import Counter
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.dimensions import ColumnDimension
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice, chain
+from bisect import bisect_right
 
-from mappings import load_mappings, save_mappings, check_file_mapping_status
+from mappings import (
+    load_mappings,
+    load_mappings_readonly,
+    save_mappings,
+    check_file_mapping_status,
+    check_renamed_file_status
+)
 from filename_generator import (
-    is_part_number_filename,
-    find_original_filename_by_part_number,
+    is_part_number,
     get_or_create_part_mapping
 )
 from solidworks import (
-    read_solidworks_properties,
+    read_solidworks_properties_parallel,
     update_solidworks_property,
+    get_cached_solidworks_properties,
+    solidworks_session,
     SOLIDWORKS_AVAILABLE
 )
 
+# SOLIDWORKS formats that are already compressed internally, so zipping
+# stores them as-is
+PRECOMPRESSED_EXTENSIONS = ('.sldprt', '.sldasm', '.slddrw')
+
+# Runs of digits long enough to hold a part number (compiled once, searched
+# for every CSV cell)
+DIGIT_RUN_PATTERN = re.compile(r'\d{9,}')
+
+# Processed file entries of the last mappings snapshot listed or matched against
+_processed_files_cache = {'entry': (None, None)}
+
+# Match tables built from the last mappings snapshot matched against
+_match_tables_cache = {'entry': (None, None)}
+
+# Match type of each lookup rank of a CSV value, best first
+MATCH_TYPES = ('fullPartNumber', 'basePartNumber', 'filename', 'filename')
+
+# Distinct CSV values whose matches are remembered while matching one CSV
+VALUE_MATCHES_LIMIT = 100000
+
+# Copy buffer for saving uploaded files (Werkzeug's default is 16 KiB)
+UPLOAD_BUFFER_SIZE = 1024 * 1024
+
+# SOLIDWORKS files and related export formats picked up by a folder scan
+# (a tuple, so one str.endswith call checks them all)
+SOLIDWORKS_EXTENSIONS = ('.sldprt', '.sldasm', '.slddrw', '.step', '.stp', '.x_t', '.x_b')
+
+def scan_solidworks_files(folder_path, include_subdirectories=False):
+    """Yield directory entries of SOLIDWORKS files in a folder (one directory read per folder)"""
+    # Same path form as pathlib produced, so absolute-path mapping keys still match
+    pending = [str(Path(folder_path))]
+    while pending:
+        # Folders that cannot be read are skipped, as Path.glob did
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                # Extension first: it is a string test, is_file() may need a stat
+                if entry.name.lower().endswith(SOLIDWORKS_EXTENSIONS) and entry.is_file():
+                    yield entry
+                elif include_subdirectories and entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+
+def copy_last_file(source_paths, target_path):
+    """Copy the last of source_paths that can be copied to target_path: (its index or None, [(source path, error), ...])"""
+    # Copying every file to the same name in order would leave the last one
+    # that copied; so try from the end and stop at the first that copies.
+    # Only the data is copied: copyfile uses the OS fast paths (sendfile /
+    # copy_file_range) and skips copy2's metadata syscalls
+    errors = []
+    for index in range(len(source_paths) - 1, -1, -1):
+        try:
+            shutil.copyfile(source_paths[index], target_path)
+        except Exception as e:
+            errors.append((source_paths[index], e))
+            continue
+        return index, errors
+    return None, errors
+
+# Header style of generated workbooks (openpyxl styles are immutable, so shared)
+HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+
+class ProcessedFilenameSearch:
+    """Substring and prefix searches over processed filenames that return the first file in list order"""
+
+    # Joins the names into one string; it never occurs in a filename, so a
+    # hit cannot span two names
+    SEPARATOR = '\0'
+
+    def __init__(self, processed_files, names, names_no_ext):
+        # names and names_no_ext are the lowercase file names, in processed_files order
+        self._files = processed_files
+        self._names_text, self._name_starts = self._join(names)
+        self._names_no_ext_text, self._name_no_ext_starts = self._join(names_no_ext)
+        # name -> index of its first file
+        self._first_by_name = {}
+        for index, name in enumerate(names):
+            self._first_by_name.setdefault(name, index)
+        self._first_by_name_no_ext = {}
+        for index, name_no_ext in enumerate(names_no_ext):
+            self._first_by_name_no_ext.setdefault(name_no_ext, index)
+        # Distinct lengths of names without extension, shortest first
+        self._name_no_ext_lengths = sorted({len(name_no_ext) for name_no_ext in names_no_ext})
+
+    def _join(self, names):
+        starts = []
+        offset = 0
+        for name in names:
+            starts.append(offset)
+            offset += len(name) + 1
+        return self.SEPARATOR.join(names), starts
+
+    def _first_containing(self, text, starts, value):
+        # str.find returns the lowest offset, which lies in the first name containing value
+        position = text.find(value)
+        if position < 0:
+            return None
+        return bisect_right(starts, position) - 1
+
+    def find_token(self, token, token_no_ext):
+        """Get the first file whose name contains token, whose name without extension contains token_no_ext, or whose name is token_no_ext"""
+        indexes = [
+            self._first_containing(self._names_text, self._name_starts, token),
+            self._first_containing(self._names_no_ext_text, self._name_no_ext_starts, token_no_ext),
+            self._first_by_name.get(token_no_ext)
+        ]
+        indexes = [index for index in indexes if index is not None]
+        return self._files[min(indexes)] if indexes else None
+
+    def find_prefix_of(self, value):
+        """Get the first file whose name without extension is a prefix of value"""
+        first_index = None
+        for length in self._name_no_ext_lengths:
+            if length > len(value):
+                break
+            index = self._first_by_name_no_ext.get(value[:length])
+            if index is not None and (first_index is None or index < first_index):
+                first_index = index
+        return self._files[first_index] if first_index is not None else None
+
+def get_processed_files(mappings):
+    """Get the processed file entries of a read-only mappings snapshot, built once per snapshot"""
+    # Same identity check as get_match_tables; the entries are shared, so
+    # they must never be modified
+    cached_mappings, processed_files = _processed_files_cache['entry']
+    if cached_mappings is not mappings:
+        processed_files = [
+            {
+                'originalPath': file_path,
+                'originalName': os.path.basename(file_path),
+                'basePartNumber': mapping_data['base'],
+                'revision': mapping_data['revision'],
+                'fullPartNumber': mapping_data['full']
+            }
+            for file_path, mapping_data in mappings.items()
+        ]
+        _processed_files_cache['entry'] = (mappings, processed_files)
+    return processed_files
+
+def build_match_tables(mappings):
+    """Build the lookup dictionaries used to match CSV rows"""
+    processed_files = get_processed_files(mappings)
+    
+    # Lowercase names with and without extension, derived once per file
+    names = [f['originalName'].lower() for f in processed_files]
+    names_no_ext = [os.path.splitext(name)[0] for name in names]
+    
+    # Create lookup dictionaries
+    by_full_part = {f['fullPartNumber']: f for f in processed_files}
+    by_base_part = {f['basePartNumber']: f for f in processed_files}
+    by_filename = dict(zip(names, processed_files))
+    
+    # Also create lookup by filename without extension
+    by_filename_no_ext = {}
+    for name_no_ext, f in zip(names_no_ext, processed_files):
+        by_filename_no_ext.setdefault(name_no_ext, f)
+    
+    filename_search = ProcessedFilenameSearch(processed_files, names, names_no_ext)
+    
+    return by_full_part, by_base_part, by_filename, by_filename_no_ext, filename_search
+
+def get_match_tables(mappings):
+    """Get the match tables for a read-only mappings snapshot, built once per snapshot"""
+    # Saving mappings replaces the shared snapshot, so identity tells whether
+    # the cached tables are still current (snapshot and tables are stored as
+    # one tuple so concurrent requests never see a mismatched pair)
+    cached_mappings, tables = _match_tables_cache['entry']
+    if cached_mappings is not mappings:
+        tables = build_match_tables(mappings)
+        _match_tables_cache['entry'] = (mappings, tables)
+    return tables
+
+def find_embedded_part_numbers(value):
+    """Get the first 12-digit and first 9-digit number in value (None if absent) in one regex pass"""
+    # Most cells are words or short numbers: too short to hold a part number,
+    # or without any run of 9 digits, so one length test or search rules them out
+    if len(value) < 9:
+        return None, None
+    digit_run = DIGIT_RUN_PATTERN.search(value)
+    if digit_run is None:
+        return None, None
+    
+    # A 12-digit search matches the start of the first run of 12+ digits, a
+    # 9-digit search the start of the first run of 9+ digits
+    digits = digit_run.group()
+    base_part_number = digits[:9]
+    if len(digits) >= 12:
+        return digits[:12], base_part_number
+    for digit_run in DIGIT_RUN_PATTERN.finditer(value, digit_run.end()):
+        digits = digit_run.group()
+        if len(digits) >= 12:
+            return digits[:12], base_part_number
+    return None, base_part_number
+
+def match_csv_value(value_str, tables):
+    """Get (rank, file) of the best lookup match of one CSV value, ranked as in MATCH_TYPES; (None, None) if none"""
+    by_full_part, by_base_part, by_filename, by_filename_no_ext, _ = tables
+    full_part_number, base_part_number = find_embedded_part_numbers(value_str)
+    
+    # Try full part number (12 digits) - exact or embedded
+    matched = by_full_part.get(full_part_number)
+    if matched:
+        return 0, matched
+    
+    # Try base part number (9 digits) - exact or embedded
+    matched = by_base_part.get(base_part_number)
+    if matched:
+        return 1, matched
+    
+    # Try exact filename match (with extension)
+    filename = value_str.lower()
+    matched = by_filename.get(filename)
+    if matched:
+        return 2, matched
+    
+    # Try filename without extension match
+    matched = by_filename_no_ext.get(os.path.splitext(filename)[0])
+    if matched:
+        return 3, matched
+    
+    return None, None
+
+def match_csv_row(row, tables, value_matches):
+    """Find the processed file a CSV row refers to: (file, match type), or (None, None)"""
+    _, _, by_filename, by_filename_no_ext, filename_search = tables
+    # DictReader values are already strings, except None for missing fields
+    # and a list of the extra fields of a long row (under the None key)
+    values = [value.strip() for key, value in row.items() if key is not None and value]
+    extra_values = row.get(None)
+    if extra_values:
+        values.extend(value.strip() for value in extra_values if value)
+    
+    # The best lookup match of the row is the first value with the best rank.
+    # Values repeat a lot across rows (part numbers, filenames), so each
+    # distinct value is matched once per CSV and remembered in value_matches.
+    best = None
+    best_rank = len(MATCH_TYPES)
+    for value_str in values:
+        value_match = value_matches.get(value_str)
+        if value_match is None:
+            if len(value_matches) >= VALUE_MATCHES_LIMIT:
+                value_matches.clear()
+            value_match = value_matches[value_str] = match_csv_value(value_str, tables)
+        rank, matched = value_match
+        if matched and rank < best_rank:
+            best, best_rank = matched, rank
+            # A full part number wins outright
+            if rank == 0:
+                break
+    
+    if best:
+        return best, MATCH_TYPES[best_rank]
+    
+    # The fallbacks below compare lowercase values only
+    values = [value_str.lower() for value_str in values]
+    
+    # Try extracting filename from CSV (filename is usually at the start before first space)
+    # This handles cases like "SHRD-FSCM-PLT-MS-101-LH DESCRIPTION TEXT"
+    for value_str in values:
+        # Extract potential filename - take first "word" (before first space)
+        # or match pattern like "SHRD-FSCM-PLT-MS-101-LH"
+        parts = value_str.split(None, 1)
+        if parts:
+            potential_filename = parts[0]
+            potential_filename_no_ext = os.path.splitext(potential_filename)[0]
+            
+            # Try exact match with extension
+            matched = by_filename.get(potential_filename)
+            if matched:
+                return matched, 'filename'
+            
+            # Try match without extension
+            matched = by_filename_no_ext.get(potential_filename_no_ext)
+            if matched:
+                return matched, 'filename'
+            
+            # Try the processed filenames: the first one that equals, starts
+            # with or contains the CSV filename (every such check reduces to
+            # the three searches of find_token)
+            matched = filename_search.find_token(potential_filename, potential_filename_no_ext)
+            if matched:
+                return matched, 'filename'
+    
+    # Try reverse: check if CSV value starts with any processed filename
+    # (a name without extension is a prefix of its name, and a value without
+    # extension a prefix of the value, so that one check covers all four)
+    for value_str in values:
+        matched = filename_search.find_prefix_of(value_str)
+        if matched:
+            return matched, 'filename'
+    
+    return None, None
+
+def write_excel_table(destination, sheet_title, columns, rows):
+    """Write an Excel sheet with a styled header row; columns are (header, width) pairs"""
+    # Write-only mode streams rows instead of keeping every cell in memory
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title)
+    
+    # Column widths (must be set before any row is written), assigned as
+    # finished dimensions instead of lazily creating and then updating them
+    for index, (_, width) in enumerate(columns, 1):
+        letter = get_column_letter(index)
+        ws.column_dimensions[letter] = ColumnDimension(ws, index=letter, min=index, max=index, width=width)
+    
+    # Styled headers
+    headers = []
+    for title, _ in columns:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = HEADER_FONT
+        cell.fill = HEADER_FILL
+        headers.append(cell)
+    ws.append(headers)
+    
+    for row in rows:
+        ws.append(row)
+    
+    wb.save(destination)
+
+def write_part_numbers_list(part_numbers, excel_path):
+    """Write the Part_Numbers_List.xlsx table (ITEM NO., PART NUMBER, blank QTY)"""
+    # QTY is left blank for manual entry (None writes no cell at all)
+    write_excel_table(
+        excel_path,
+        "Part Numbers",
+        [('ITEM NO.', 12), ('PART NUMBER', 15), ('QTY', 10)],
+        ((item_no, part_number, None) for item_no, part_number in enumerate(part_numbers, 1))
+    )
+
 def register_routes(app):
     """Register all routes with the Flask app"""
     
+    def json_dumps(value):
+        """Encode a value for a streamed JSON response, as compact as jsonify's"""
+        return app.json.dumps(value, separators=(',', ':'))
+    
     @app.route('/api/scan-folder', methods=['POST'])
     def scan_folder():
         """Scan folder for SOLIDWORKS files and check for existing mappings"""
@@ -37,76 +386,56 @@ def register_routes(app):
         if not folder_path or not os.path.exists(folder_path):
             return jsonify({'error': 'Invalid folder path'}), 400
         
-        # Load existing mappings
-        mappings = load_mappings()
+        # Load existing mappings (only read here)
+        mappings = load_mappings_readonly()
         
         # Find all SOLIDWORKS files and related formats
-        solidworks_extensions = ['.sldprt', '.sldasm', '.slddrw', '.step', '.stp', '.x_t', '.x_b']
         files = []
         processed_count = 0
         new_count = 0
         
+        # Every scanned path starts with the folder path, so relative paths are
+        # a slice (os.path.relpath normalizes both paths on every call)
+        relative_start = len(os.path.join(str(Path(folder_path)), ''))
+        
         has_renamed_files = False
-        for ext in solidworks_extensions:
-            # Use recursive pattern if subdirectories should be included
+        for entry in scan_solidworks_files(folder_path, include_subdirectories):
+            file_str = entry.path
+            # For subdirectories, preserve relative path; otherwise just filename
             if include_subdirectories:
-                pattern = f'**/*{ext}'
+                relative_path = file_str[relative_start:]
             else:
-                pattern = f'*{ext}'
+                relative_path = entry.name  # Just the filename, no subdirectory path
+            file_name = entry.name
             
-            for file_path in Path(folder_path).glob(pattern):
-                file_str = str(file_path)
-                # For subdirectories, preserve relative path; otherwise just filename
-                if include_subdirectories:
-                    relative_path = os.path.relpath(file_str, folder_path)
-                else:
-                    relative_path = file_path.name  # Just the filename, no subdirectory path
-                file_name = file_path.name
-                
-                # Check if filename is a part number (12 digits)
-                is_renamed_file = is_part_number_filename(file_name)
+            # Check if filename is a part number (12 digits) mapped to original files
+            renamed_status = check_renamed_file_status(file_name, mappings)
+            is_renamed_file = renamed_status is not None
+            
+            if is_renamed_file:
+                has_renamed_files = True
+                mapping_status, original_filenames = renamed_status
+            else:
                 original_filenames = []
-                
-                if is_renamed_file:
-                    has_renamed_files = True
-                    # Extract part number from filename
-                    part_number = os.path.splitext(file_name)[0]
-                    # Find original filename(s) with this part number
-                    original_filenames = find_original_filename_by_part_number(part_number, mappings)
-                    # Set mapping status based on found original files
-                    if original_filenames:
-                        mapping_status = {
-                            'hasMapping': True,
-                            'vendorPartNumber': part_number,
-                            'basePartNumber': part_number[:9],
-                            'revision': int(part_number[9:])
-                        }
-                        processed_count += 1
-                    else:
-                        mapping_status = {'hasMapping': False}
-                        new_count += 1
-                else:
-                    # Check for existing mapping (try both absolute and relative paths)
-                    mapping_status = check_file_mapping_status(file_str, mappings)
-                    if not mapping_status['hasMapping']:
-                        mapping_status = check_file_mapping_status(relative_path, mappings)
-                    
-                    if mapping_status['hasMapping']:
-                        processed_count += 1
-                    else:
-                        new_count += 1
-                
-                files.append({
-                    'name': file_name,
-                    'path': file_str,
-                    'relativePath': relative_path,
-                    'hasMapping': mapping_status['hasMapping'],
-                    'existingPartNumber': mapping_status.get('vendorPartNumber'),
-                    'existingBase': mapping_status.get('basePartNumber'),
-                    'existingRevision': mapping_status.get('revision'),
-                    'isRenamedFile': is_renamed_file,
-                    'originalFilenames': original_filenames
-                })
+                # Check for existing mapping (try both absolute and relative paths)
+                mapping_status = check_file_mapping_status(file_str, mappings, relative_path)
+            
+            if mapping_status['hasMapping']:
+                processed_count += 1
+            else:
+                new_count += 1
+            
+            files.append({
+                'name': file_name,
+                'path': file_str,
+                'relativePath': relative_path,
+                'hasMapping': mapping_status['hasMapping'],
+                'existingPartNumber': mapping_status.get('vendorPartNumber'),
+                'existingBase': mapping_status.get('basePartNumber'),
+                'existingRevision': mapping_status.get('revision'),
+                'isRenamedFile': is_renamed_file,
+                'originalFilenames': original_filenames
+            })
         
         return jsonify({
             'files': files,
@@ -137,49 +466,44 @@ def register_routes(app):
         try:
             # Save uploaded files temporarily
             file_paths = []
+            created_dirs = set()
             for file in uploaded_files:
                 if file.filename:
                     # Extract relative path from filename (includes folder structure)
                     relative_path = file.filename
                     temp_path = os.path.join(temp_dir, relative_path)
                     
-                    # Create directory structure if needed
-                    os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+                    # Create directory structure if needed (once per directory)
+                    temp_subdir = os.path.dirname(temp_path)
+                    if temp_subdir not in created_dirs:
+                        os.makedirs(temp_subdir, exist_ok=True)
+                        created_dirs.add(temp_subdir)
                     
-                    # Save file
-                    file.save(temp_path)
+                    # Save file (large buffer, CAD files are often tens of MB)
+                    file.save(temp_path, buffer_size=UPLOAD_BUFFER_SIZE)
                     file_paths.append({
                         'temp_path': temp_path,
                         'relative_path': relative_path,
                         'name': os.path.basename(relative_path)
                     })
             
+            # Read existing properties of all files up front, in parallel
+            all_properties = read_solidworks_properties_parallel([file_info['temp_path'] for file_info in file_paths])
+            
             # Process each file
-            for file_info in file_paths:
+            for file_info, properties in zip(file_paths, all_properties):
                 file_path = file_info['temp_path']
                 file_name = file_info['name']
                 relative_path = file_info['relative_path']
                 
-                # Check if filename is a part number (12 digits)
-                is_renamed_file = is_part_number_filename(file_name)
-                original_filenames = []
+                # Check if filename is a part number (12 digits) mapped to original files
+                renamed_status = check_renamed_file_status(file_name, mappings)
+                is_renamed_file = renamed_status is not None
                 
                 if is_renamed_file:
-                    # Extract part number from filename
-                    part_number = os.path.splitext(file_name)[0]
-                    # Find original filename(s) with this part number
-                    original_filenames = find_original_filename_by_part_number(part_number, mappings)
-                    # Set mapping status based on found original files
-                    if original_filenames:
-                        mapping_status = {
-                            'hasMapping': True,
-                            'vendorPartNumber': part_number,
-                            'basePartNumber': part_number[:9],
-                            'revision': int(part_number[9:])
-                        }
-                    else:
-                        mapping_status = {'hasMapping': False}
+                    mapping_status, original_filenames = renamed_status
                 else:
+                    original_filenames = []
                     # Check for existing mapping
                     mapping_status = check_file_mapping_status(relative_path, mappings)
                 
@@ -196,13 +520,13 @@ def register_routes(app):
                     'originalFilenames': original_filenames
                 }
                 
-                # Read existing properties
-                properties = read_solidworks_properties(file_path)
+                # Use the properties read above
                 if properties:
                     file_data['properties'] = properties
-                    if 'Vendor Part Number' in properties:
-                        existing_part_number = properties['Vendor Part Number'].get('resolved', '')
-                        if existing_part_number and len(existing_part_number) == 12:
+                    vendor_property = properties.get('Vendor Part Number')
+                    if vendor_property is not None:
+                        existing_part_number = vendor_property.get('resolved', '')
+                        if existing_part_number and is_part_number(existing_part_number):
                             file_data['vendorPartNumber'] = existing_part_number
                             file_data['basePartNumber'] = existing_part_number[:9]
                             file_data['revision'] = int(existing_part_number[9:])
@@ -235,10 +559,10 @@ def register_routes(app):
                     rev = file_data['revision']
                     mappings[relative_path] = {'base': base, 'revision': rev}
                 
-                save_mappings(mappings)
-                
                 results.append(file_data)
             
+            # Save new mappings once for the whole upload
+            save_mappings(mappings)
             return jsonify({'results': results})
         
         finally:
@@ -252,34 +576,27 @@ def register_routes(app):
     def read_properties():
         """Read properties from SOLIDWORKS files"""
         data = request.json
-        file_paths = data.get('filePaths', [])
+        # Each path once, in order (a resubmitting client can repeat paths)
+        file_paths = list(dict.fromkeys(data.get('filePaths', [])))
         
         results = []
         mappings = load_mappings()
         
-        for file_path in file_paths:
+        # Read existing properties of all files up front, in parallel (cached
+        # while a file is unchanged, so rescans skip the API)
+        all_properties = read_solidworks_properties_parallel(file_paths, cached=True)
+        
+        for file_path, properties in zip(file_paths, all_properties):
             file_name = os.path.basename(file_path)
             
-            # Check if filename is a part number (12 digits)
-            is_renamed_file = is_part_number_filename(file_name)
-            original_filenames = []
+            # Check if filename is a part number (12 digits) mapped to original files
+            renamed_status = check_renamed_file_status(file_name, mappings)
+            is_renamed_file = renamed_status is not None
             
             if is_renamed_file:
-                # Extract part number from filename
-                part_number = os.path.splitext(file_name)[0]
-                # Find original filename(s) with this part number
-                original_filenames = find_original_filename_by_part_number(part_number, mappings)
-                # Set mapping status based on found original files
-                if original_filenames:
-                    mapping_status = {
-                        'hasMapping': True,
-                        'vendorPartNumber': part_number,
-                        'basePartNumber': part_number[:9],
-                        'revision': int(part_number[9:])
-                    }
-                else:
-                    mapping_status = {'hasMapping': False}
+                mapping_status, original_filenames = renamed_status
             else:
+                original_filenames = []
                 # Check for existing mapping
                 mapping_status = check_file_mapping_status(file_path, mappings)
             
@@ -296,14 +613,14 @@ def register_routes(app):
                 'originalFilenames': original_filenames
             }
             
-            # Read existing properties
-            properties = read_solidworks_properties(file_path)
+            # Use the properties read above
             if properties:
                 file_info['properties'] = properties
                 # Check if vendor part number already exists
-                if 'Vendor Part Number' in properties:
-                    existing_part_number = properties['Vendor Part Number'].get('resolved', '')
-                    if existing_part_number and len(existing_part_number) == 12:
+                vendor_property = properties.get('Vendor Part Number')
+                if vendor_property is not None:
+                    existing_part_number = vendor_property.get('resolved', '')
+                    if existing_part_number and is_part_number(existing_part_number):
                         file_info['vendorPartNumber'] = existing_part_number
                         file_info['basePartNumber'] = existing_part_number[:9]
                         file_info['revision'] = int(existing_part_number[9:])
@@ -336,10 +653,10 @@ def register_routes(app):
                 rev = file_info['revision']
                 mappings[file_path] = {'base': base, 'revision': rev}
             
-            save_mappings(mappings)
-            
             results.append(file_info)
         
+        # Save new mappings once for the whole batch
+        save_mappings(mappings)
         return jsonify({'results': results})
 
     @app.route('/api/create-revision', methods=['POST'])
@@ -354,36 +671,24 @@ def register_routes(app):
         
         mappings = load_mappings()
         
-        if file_path not in mappings:
-            return jsonify({'error': 'File not found in mappings'}), 404
-        
         # Get current mapping
-        current_mapping = mappings[file_path]
-        
-        # Handle old format migration
-        if isinstance(current_mapping, str):
-            if len(current_mapping) == 12:
-                base = current_mapping[:9]
-                rev = int(current_mapping[9:])
-                current_mapping = {'base': base, 'revision': rev}
-            else:
-                return jsonify({'error': 'Invalid mapping format'}), 400
+        current_mapping = mappings.get(file_path)
+        if current_mapping is None:
+            return jsonify({'error': 'File not found in mappings'}), 404
         
         # Determine new revision number
         if new_revision is None:
-            new_revision = current_mapping.get('revision', 1) + 1
+            new_revision = current_mapping['revision'] + 1
         
-        # Update mapping with new revision
-        current_mapping['revision'] = new_revision
+        # Update mapping with new revision (as a new dict, stored mappings are not modified in place)
+        current_mapping = dict(current_mapping, revision=new_revision)
         mappings[file_path] = current_mapping
         save_mappings(mappings)
         
-        full_part_number = f"{current_mapping['base']}{new_revision:03d}"
-        
         return jsonify({
             'basePartNumber': current_mapping['base'],
             'revision': new_revision,
-            'vendorPartNumber': full_part_number
+            'vendorPartNumber': current_mapping['full']
         })
 
     @app.route('/api/update-properties', methods=['POST'])
@@ -395,31 +700,44 @@ def register_routes(app):
         mappings = load_mappings()
         results = []
         
-        for update in updates:
-            file_path = update['filePath']
-            vendor_part_number = update['vendorPartNumber']
-            revision = update.get('revision')
-            
-            # Update mapping if revision is provided
-            if revision is not None:
-                mapping, _ = get_or_create_part_mapping(file_path, mappings, revision)
-                vendor_part_number = f"{mapping['base']}{mapping['revision']:03d}"
-            
-            success = update_solidworks_property(file_path, 'Vendor Part Number', vendor_part_number)
-            
-            if success:
-                results.append({
-                    'filePath': file_path,
-                    'success': True
-                })
-            else:
-                # Even if SOLIDWORKS update fails, save the mapping
-                results.append({
-                    'filePath': file_path,
-                    'success': not SOLIDWORKS_AVAILABLE,  # Success if API not available (mapping saved)
-                    'error': 'Failed to update property in file' if SOLIDWORKS_AVAILABLE else 'Mapping saved (SOLIDWORKS API not available)',
-                    'note': 'Use SOLIDWORKS to manually update files or install SOLIDWORKS Document Manager API' if not SOLIDWORKS_AVAILABLE else None
-                })
+        # Updates share one COM session instead of starting one per file
+        with solidworks_session():
+            for update in updates:
+                file_path = update['filePath']
+                vendor_part_number = update['vendorPartNumber']
+                revision = update.get('revision')
+                
+                # Update mapping if revision is provided
+                if revision is not None:
+                    _, vendor_part_number = get_or_create_part_mapping(file_path, mappings, revision)
+                
+                # Skip the (slow) open and save of the file when its properties
+                # are cached and already hold the part number; on a cache miss
+                # the file is written without reading it first
+                properties = get_cached_solidworks_properties(file_path)
+                if properties and properties.get('Vendor Part Number', {}).get('resolved') == vendor_part_number:
+                    results.append({
+                        'filePath': file_path,
+                        'success': True,
+                        'skipped': True
+                    })
+                    continue
+                
+                success = update_solidworks_property(file_path, 'Vendor Part Number', vendor_part_number)
+                
+                if success:
+                    results.append({
+                        'filePath': file_path,
+                        'success': True
+                    })
+                else:
+                    # Even if SOLIDWORKS update fails, save the mapping
+                    results.append({
+                        'filePath': file_path,
+                        'success': not SOLIDWORKS_AVAILABLE,  # Success if API not available (mapping saved)
+                        'error': 'Failed to update property in file' if SOLIDWORKS_AVAILABLE else 'Mapping saved (SOLIDWORKS API not available)',
+                        'note': 'Use SOLIDWORKS to manually update files or install SOLIDWORKS Document Manager API' if not SOLIDWORKS_AVAILABLE else None
+                    })
         
         save_mappings(mappings)
         return jsonify({'results': results})
@@ -427,28 +745,37 @@ def register_routes(app):
     @app.route('/api/mappings', methods=['GET'])
     def get_mappings():
         """Get all vendor part number mappings"""
-        return jsonify(load_mappings())
+        return jsonify(load_mappings_readonly())
 
     @app.route('/api/export-mappings', methods=['GET'])
     def export_mappings():
         """Export mappings as CSV"""
-        mappings = load_mappings()
-        csv_lines = ['File Path,Base Part Number,Revision,Vendor Part Number']
-        for file_path, mapping_data in mappings.items():
-            if isinstance(mapping_data, dict):
-                base = mapping_data.get('base', '')
-                rev = mapping_data.get('revision', 1)
-                full = f"{base}{rev:03d}"
-                csv_lines.append(f'"{file_path}","{base}","{rev}","{full}"')
-            else:
-                # Old format - migrate
-                if len(str(mapping_data)) == 12:
-                    base = str(mapping_data)[:9]
-                    rev = int(str(mapping_data)[9:])
-                    csv_lines.append(f'"{file_path}","{base}","{rev}","{mapping_data}"')
-                else:
-                    csv_lines.append(f'"{file_path}","","","{mapping_data}"')
-        return jsonify({'csv': '\n'.join(csv_lines)})
+        mappings = load_mappings_readonly()
+        
+        def generate_csv():
+            # Stream the CSV in chunks of rows instead of building it in memory;
+            # csv.writer quotes paths that contain quotes correctly, and
+            # writerows() formats a whole chunk in one call
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator='\n')
+            yield 'File Path,Base Part Number,Revision,Vendor Part Number\n'
+            rows = (
+                (file_path, mapping_data['base'], mapping_data['revision'], mapping_data['full'])
+                for file_path, mapping_data in mappings.items()
+            )
+            while chunk := list(islice(rows, 1000)):
+                writer.writerows(chunk)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        
+        return Response(
+            generate_csv(),
+            mimetype='text/csv',
+            headers={
+                'Content-Disposition': 'attachment; filename=vendor_part_mappings.csv'
+            }
+        )
 
     @app.route('/api/generate-files-with-part-numbers', methods=['POST'])
     def generate_files_with_part_numbers():
@@ -465,12 +792,12 @@ def register_routes(app):
             output_folder = os.path.join(folder_path, 'Vendor_Part_Numbers')
             os.makedirs(output_folder, exist_ok=True)
             
-            # Count part numbers for quantity
-            part_number_counts = Counter()
-            file_extensions = {}
+            # Collect files to copy with part number as name
+            copy_jobs = {}  # new filename -> [(source path, part number), ...] in request order
             
-            # Copy files with part number as name
-            copied_files = []
+            # Files directly in the folder, listed once instead of checking each path
+            with os.scandir(folder_path) as entries:
+                folder_files = {entry.name: entry.path for entry in entries if entry.is_file()}
             for file_info in files_data:
                 original_path = file_info.get('path')
                 vendor_part_number = file_info.get('vendorPartNumber')
@@ -478,11 +805,8 @@ def register_routes(app):
                 if not vendor_part_number or not original_path:
                     continue
                 
-                # Get original file extension
-                original_ext = os.path.splitext(original_path)[1] or os.path.splitext(file_info.get('name', ''))[1]
-                if not original_ext:
-                    # Try to determine from file_info name
-                    original_ext = os.path.splitext(file_info.get('name', ''))[1]
+                # Get original file extension (or try to determine it from the file_info name)
+                original_ext = os.path.splitext(original_path)[1] or os.path.splitext(file_info.get('name') or '')[1]
                 
                 # Build full original path
                 if os.path.isabs(original_path):
@@ -490,73 +814,66 @@ def register_routes(app):
                 else:
                     full_original_path = os.path.join(folder_path, original_path)
                 
-                # Check if file exists
-                if not os.path.exists(full_original_path):
+                # Check if file exists (files directly in the folder are looked up
+                # in the listing, anything else needs a stat)
+                file_name = os.path.basename(original_path)
+                if full_original_path != folder_files.get(file_name) and not os.path.exists(full_original_path):
                     # Try with just filename
-                    full_original_path = os.path.join(folder_path, os.path.basename(original_path))
-                    if not os.path.exists(full_original_path):
-                        continue
+                    full_original_path = folder_files.get(file_name)
+                    if full_original_path is None:
+                        # The listing is matched by exact name, but the file
+                        # system may not be (Windows names ignore case)
+                        full_original_path = os.path.join(folder_path, file_name)
+                        if not os.path.exists(full_original_path):
+                            continue
                 
                 # New filename: part number + original extension
                 new_filename = f"{vendor_part_number}{original_ext}"
-                new_file_path = os.path.join(output_folder, new_filename)
                 
-                # Copy file
-                try:
-                    shutil.copy2(full_original_path, new_file_path)
-                    copied_files.append(new_filename)
-                    part_number_counts[vendor_part_number] += 1
-                    file_extensions[vendor_part_number] = original_ext
-                except Exception as e:
-                    print(f"Error copying file {full_original_path}: {e}")
-                    continue
-            
-            # Generate Excel file
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Part Numbers"
-            
-            # Headers
-            ws['A1'] = 'ITEM NO.'
-            ws['B1'] = 'PART NUMBER'
-            ws['C1'] = 'QTY'
-            
-            # Style headers
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            header_font_color = Font(bold=True, color="FFFFFF")
-            
-            ws['A1'].font = header_font_color
-            ws['A1'].fill = header_fill
-            ws['B1'].font = header_font_color
-            ws['B1'].fill = header_fill
-            ws['C1'].font = header_font_color
-            ws['C1'].fill = header_fill
+                # Files with the same new name are copied as one job (see copy_last_file)
+                copy_jobs.setdefault(new_filename, []).append((full_original_path, vendor_part_number))
             
-            # Add data (unique part numbers only, sorted)
-            row = 2
-            item_no = 1
-            for part_number in sorted(set(part_number_counts.keys())):
-                ws[f'A{row}'] = item_no
-                ws[f'B{row}'] = part_number
-                ws[f'C{row}'] = ''  # QTY left blank for manual entry
-                row += 1
-                item_no += 1
-            
-            # Auto-adjust column widths
-            ws.column_dimensions['A'].width = 12
-            ws.column_dimensions['B'].width = 15
-            ws.column_dimensions['C'].width = 10
+            # Copy files in parallel (disk I/O, so threads overlap well)
+            files_copied = 0
+            unique_part_numbers = set()  # QTY is filled in by hand, so counts are not needed
+            overwritten = []
+            errors = []
+            with ThreadPoolExecutor(max_workers=min(16, (os.cpu_count() or 1) * 4)) as executor:
+                futures = {
+                    executor.submit(copy_last_file, [source_path for source_path, _ in sources], os.path.join(output_folder, new_filename)): new_filename
+                    for new_filename, sources in copy_jobs.items()
+                }
+                for future in as_completed(futures):
+                    new_filename = futures[future]
+                    sources = copy_jobs[new_filename]
+                    copied_index, copy_errors = future.result()
+                    for source_path, error in copy_errors:
+                        errors.append({'filePath': source_path, 'newFilename': new_filename, 'error': str(error)})
+                    if copied_index is None:
+                        continue
+                    
+                    # Files listed before the copied one were not copied; the
+                    # copied file takes their name, as when copying in order
+                    copied_path, vendor_part_number = sources[copied_index]
+                    files_copied += 1
+                    unique_part_numbers.add(vendor_part_number)
+                    overwritten.extend(
+                        {'filePath': source_path, 'newFilename': new_filename, 'overwrittenBy': copied_path}
+                        for source_path, _ in sources[:copied_index]
+                    )
             
-            # Save Excel file
+            # Generate Excel file (unique part numbers only, sorted)
             excel_path = os.path.join(output_folder, 'Part_Numbers_List.xlsx')
-            wb.save(excel_path)
+            write_part_numbers_list(sorted(unique_part_numbers), excel_path)
             
             return jsonify({
                 'success': True,
                 'outputFolder': output_folder,
-                'filesCopied': len(copied_files),
-                'uniquePartNumbers': len(set(part_number_counts.keys())),
-                'excelFile': excel_path
+                'filesCopied': files_copied,
+                'uniquePartNumbers': len(unique_part_numbers),
+                'excelFile': excel_path,
+                'overwritten': overwritten,
+                'errors': errors
             })
         
         except Exception as e:
@@ -573,136 +890,83 @@ def register_routes(app):
         if not uploaded_files:
             return jsonify({'error': 'No files selected'}), 400
         
+        # Create temporary directory for the zip
+        temp_dir = tempfile.mkdtemp()
         try:
-            # Create temporary directory for processing
-            temp_dir = tempfile.mkdtemp()
-            output_folder = os.path.join(temp_dir, 'Vendor_Part_Numbers')
-            os.makedirs(output_folder, exist_ok=True)
-            
-            # Count part numbers for quantity
-            part_number_counts = Counter()
-            
-            # Save uploaded files with part number names
-            copied_files = []
-            for file in uploaded_files:
-                if not file.filename:
-                    continue
-                
-                # Extract part number from filename (format: partnumber.ext)
-                # The filename is already set to partnumber.ext in FormData
-                vendor_part_number = os.path.splitext(file.filename)[0]
-                
-                # New filename is already set in FormData
-                new_filename = file.filename
-                new_file_path = os.path.join(output_folder, new_filename)
-                
-                # Save file
-                try:
-                    file.save(new_file_path)
-                    copied_files.append(new_filename)
-                    part_number_counts[vendor_part_number] += 1
-                except Exception as e:
-                    print(f"Error saving file {new_filename}: {e}")
-                    continue
-            
-            # Generate Excel file
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Part Numbers"
-            
-            # Headers
-            ws['A1'] = 'ITEM NO.'
-            ws['B1'] = 'PART NUMBER'
-            ws['C1'] = 'QTY'
-            
-            # Style headers
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            header_font_color = Font(bold=True, color="FFFFFF")
-            
-            ws['A1'].font = header_font_color
-            ws['A1'].fill = header_fill
-            ws['B1'].font = header_font_color
-            ws['B1'].fill = header_fill
-            ws['C1'].font = header_font_color
-            ws['C1'].fill = header_fill
-            
-            # Add data (unique part numbers only, sorted)
-            row = 2
-            item_no = 1
-            for part_number in sorted(set(part_number_counts.keys())):
-                ws[f'A{row}'] = item_no
-                ws[f'B{row}'] = part_number
-                ws[f'C{row}'] = ''  # QTY left blank for manual entry
-                row += 1
-                item_no += 1
-            
-            # Auto-adjust column widths
-            ws.column_dimensions['A'].width = 12
-            ws.column_dimensions['B'].width = 15
-            ws.column_dimensions['C'].width = 10
-            
-            # Save Excel file
-            excel_path = os.path.join(output_folder, 'Part_Numbers_List.xlsx')
-            wb.save(excel_path)
-            
             # Create zip file with all generated files
             zip_path = os.path.join(temp_dir, 'Vendor_Part_Numbers.zip')
             with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(output_folder):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, output_folder)
-                        zipf.write(file_path, arcname)
-            
-            # Read zip file and return it
-            with open(zip_path, 'rb') as f:
-                zip_data = f.read()
-            
-            # Clean up temp directory
-            shutil.rmtree(temp_dir, ignore_errors=True)
+                # Write uploaded files with part number names straight into the zip,
+                # instead of saving them to disk first. One entry per name (a zip
+                # allows duplicates, extracting them does not); the last upload of
+                # a name wins, as when saving them to one folder in order
+                files_by_name = {file.filename: file for file in uploaded_files if file.filename}
+                copied_part_numbers = []
+                for file in files_by_name.values():
+                    # Extract part number from filename (format: partnumber.ext)
+                    # The filename is already set to partnumber.ext in FormData
+                    vendor_part_number = os.path.splitext(file.filename)[0]
+                    
+                    # New filename is already set in FormData
+                    new_filename = file.filename
+                    
+                    # Add file, dated now (ZipFile.open with a bare name dates entries
+                    # 1980); SOLIDWORKS files are stored as-is, anything else is
+                    # deflated at zlib's default level
+                    zip_entry = zipfile.ZipInfo(new_filename, date_time=time.localtime()[:6])
+                    if new_filename.lower().endswith(PRECOMPRESSED_EXTENSIONS):
+                        zip_entry.compress_type = zipfile.ZIP_STORED
+                    else:
+                        zip_entry.compress_type = zipfile.ZIP_DEFLATED
+                    # An entry that fails partway cannot be taken out of the zip again,
+                    # so an error fails the whole request (and removes the zip)
+                    with zipf.open(zip_entry, 'w') as zipped_file:
+                        shutil.copyfileobj(file.stream, zipped_file, UPLOAD_BUFFER_SIZE)
+                    copied_part_numbers.append(vendor_part_number)
+                
+                # Unique part numbers (QTY is filled in by hand, so counts are not needed)
+                unique_part_numbers = set(copied_part_numbers)
+                
+                # Generate Excel file (unique part numbers only, sorted)
+                excel_output = io.BytesIO()
+                write_part_numbers_list(sorted(unique_part_numbers), excel_output)
+                # Stored as-is: an .xlsx is itself a zip
+                zipf.writestr('Part_Numbers_List.xlsx', excel_output.getvalue(), compress_type=zipfile.ZIP_STORED)
             
-            response = Response(
-                zip_data,
+            # Let the server send the file (sendfile where available) instead of
+            # reading it into memory, and remove the temp directory once the
+            # response is closed (after the file handle is, as Windows requires)
+            response = send_file(
+                zip_path,
                 mimetype='application/zip',
-                headers={
-                    'Content-Disposition': 'attachment; filename=Vendor_Part_Numbers.zip'
-                }
+                as_attachment=True,
+                download_name='Vendor_Part_Numbers.zip',
+                conditional=True
             )
+            response.call_on_close(lambda: shutil.rmtree(temp_dir, ignore_errors=True))
             return response
         
         except Exception as e:
+            shutil.rmtree(temp_dir, ignore_errors=True)
             return jsonify({'error': str(e)}), 500
 
     @app.route('/api/all-processed-files', methods=['GET'])
     def get_all_processed_files():
         """Get all processed files from mappings"""
-        mappings = load_mappings()
+        # Entries are built once per mappings change and shared with CSV matching
+        processed_files = get_processed_files(load_mappings_readonly())
         
-        processed_files = []
-        for file_path, mapping_data in mappings.items():
-            if isinstance(mapping_data, dict):
-                base = mapping_data.get('base', '')
-                rev = mapping_data.get('revision', 1)
-                full_part_number = f"{base}{rev:03d}"
-                
-                processed_files.append({
-                    'originalPath': file_path,
-                    'originalName': os.path.basename(file_path),
-                    'basePartNumber': base,
-                    'revision': rev,
-                    'fullPartNumber': full_part_number
-                })
-            elif isinstance(mapping_data, str) and len(mapping_data) == 12:
-                # Handle old format
-                processed_files.append({
-                    'originalPath': file_path,
-                    'originalName': os.path.basename(file_path),
-                    'basePartNumber': mapping_data[:9],
-                    'revision': int(mapping_data[9:]),
-                    'fullPartNumber': mapping_data
-                })
-        
-        return jsonify({'files': processed_files, 'total': len(processed_files)})
+        def generate_json():
+            # Stream the list in chunks of files; each chunk is encoded as one
+            # list, without its brackets
+            separator = ''
+            yield '{"files":['
+            for start in range(0, len(processed_files), 1000):
+                yield separator + json_dumps(processed_files[start:start + 1000])[1:-1]
+                separator = ','
+            yield f'],"total":{len(processed_files)}}}'
+        
+        return Response(generate_json(), mimetype='application/json')
 
     @app.route('/api/match-csv', methods=['POST'])
     def match_csv():
@@ -715,212 +979,68 @@ def register_routes(app):
             return jsonify({'error': 'No file selected'}), 400
         
         try:
-            # Read CSV file
-            stream = io.StringIO(csv_file.stream.read().decode("UTF8"), newline=None)
+            # Read CSV file, decoding it as rows are read instead of copying
+            # the whole upload into a string first (newline='' lets the csv
+            # module handle line endings, including quoted ones)
+            stream = io.TextIOWrapper(csv_file.stream, encoding='utf-8', newline='')
             csv_reader = csv.DictReader(stream)
             
-            # Get all processed files
-            mappings = load_mappings()
-            processed_files = []
-            for file_path, mapping_data in mappings.items():
-                if isinstance(mapping_data, dict):
-                    base = mapping_data.get('base', '')
-                    rev = mapping_data.get('revision', 1)
-                    full_part_number = f"{base}{rev:03d}"
-                    processed_files.append({
-                        'originalPath': file_path,
-                        'originalName': os.path.basename(file_path),
-                        'basePartNumber': base,
-                        'revision': rev,
-                        'fullPartNumber': full_part_number
-                    })
-                elif isinstance(mapping_data, str) and len(mapping_data) == 12:
-                    processed_files.append({
-                        'originalPath': file_path,
-                        'originalName': os.path.basename(file_path),
-                        'basePartNumber': mapping_data[:9],
-                        'revision': int(mapping_data[9:]),
-                        'fullPartNumber': mapping_data
-                    })
-            
-            # Create lookup dictionaries
-            by_full_part = {f['fullPartNumber']: f for f in processed_files}
-            by_base_part = {f['basePartNumber']: f for f in processed_files}
-            by_filename = {f['originalName'].lower(): f for f in processed_files}
-            
-            # Also create lookup by filename without extension
-            by_filename_no_ext = {}
-            for f in processed_files:
-                name_no_ext = os.path.splitext(f['originalName'])[0].lower()
-                if name_no_ext not in by_filename_no_ext:
-                    by_filename_no_ext[name_no_ext] = f
+            # Read the header and first row before streaming, so a file that is
+            # not UTF-8 CSV still gets the error response; errors further on
+            # end the streamed JSON with an error field (see generate_json)
+            first_row = next(csv_reader, None)
+            csv_rows = chain(() if first_row is None else (first_row,), csv_reader)
             
-            # Match CSV entries
-            matches = []
-            unmatched = []
-            csv_rows = list(csv_reader)
+            # Get all processed files and their lookup dictionaries
+            tables = get_match_tables(load_mappings_readonly())
             
-            for row in csv_rows:
-                # Try to match by various fields
-                matched = None
-                match_type = None
-                
-                # Try full part number (12 digits) - exact match
-                for key, value in row.items():
-                    if value:
-                        value_str = str(value).strip()
-                        # Check if entire value is a 12-digit number
-                        if len(value_str) == 12 and value_str.isdigit():
-                            if value_str in by_full_part:
-                                matched = by_full_part[value_str]
-                                match_type = 'fullPartNumber'
-                                break
-                        # Check if value contains a 12-digit number
-                        part_num_match = re.search(r'\d{12}', value_str)
-                        if part_num_match:
-                            part_num = part_num_match.group()
-                            if part_num in by_full_part:
-                                matched = by_full_part[part_num]
-                                match_type = 'fullPartNumber'
-                                break
-                
-                # Try base part number (9 digits) - exact or embedded
-                if not matched:
-                    for key, value in row.items():
-                        if value:
-                            value_str = str(value).strip()
-                            # Check if entire value is a 9-digit number
-                            if len(value_str) == 9 and value_str.isdigit():
-                                if value_str in by_base_part:
-                                    matched = by_base_part[value_str]
-                                    match_type = 'basePartNumber'
-                                    break
-                            # Check if value contains a 9-digit number
-                            part_num_match = re.search(r'\d{9}', value_str)
-                            if part_num_match:
-                                part_num = part_num_match.group()
-                                if part_num in by_base_part:
-                                    matched = by_base_part[part_num]
-                                    match_type = 'basePartNumber'
-                                    break
-                
-                # Try exact filename match (with extension)
-                if not matched:
-                    for key, value in row.items():
-                        if value:
-                            filename = str(value).strip().lower()
-                            if filename in by_filename:
-                                matched = by_filename[filename]
-                                match_type = 'filename'
-                                break
-                
-                # Try filename without extension match
-                if not matched:
-                    for key, value in row.items():
-                        if value:
-                            value_str = str(value).strip().lower()
-                            # Remove extension if present
-                            value_no_ext = os.path.splitext(value_str)[0]
-                            if value_no_ext in by_filename_no_ext:
-                                matched = by_filename_no_ext[value_no_ext]
-                                match_type = 'filename'
-                                break
-                
-                # Try extracting filename from CSV (filename is usually at the start before first space)
-                # This handles cases like "SHRD-FSCM-PLT-MS-101-LH DESCRIPTION TEXT"
-                if not matched:
-                    for key, value in row.items():
-                        if value:
-                            value_str = str(value).strip()
-                            # Extract potential filename - take first "word" (before first space)
-                            # or match pattern like "SHRD-FSCM-PLT-MS-101-LH"
-                            parts = value_str.split()
-                            if parts:
-                                potential_filename = parts[0].lower()
-                                potential_filename_no_ext = os.path.splitext(potential_filename)[0]
-                                
-                                # Try exact match with extension
-                                if potential_filename in by_filename:
-                                    matched = by_filename[potential_filename]
-                                    match_type = 'filename'
-                                    break
-                                
-                                # Try match without extension
-                                if potential_filename_no_ext in by_filename_no_ext:
-                                    matched = by_filename_no_ext[potential_filename_no_ext]
-                                    match_type = 'filename'
-                                    break
-                                
-                                # Try matching against all processed filenames (check if processed filename starts with CSV filename)
-                                for proc_file in processed_files:
-                                    proc_filename = proc_file['originalName'].lower()
-                                    proc_filename_no_ext = os.path.splitext(proc_filename)[0].lower()
-                                    
-                                    # Check if processed filename matches the extracted CSV filename
-                                    if (potential_filename == proc_filename or 
-                                        potential_filename_no_ext == proc_filename_no_ext or
-                                        potential_filename == proc_filename_no_ext or
-                                        potential_filename_no_ext == proc_filename):
-                                        matched = proc_file
-                                        match_type = 'filename'
-                                        break
-                                    
-                                    # Check if processed filename starts with CSV filename part
-                                    if (proc_filename.startswith(potential_filename) or
-                                        proc_filename_no_ext.startswith(potential_filename_no_ext)):
-                                        matched = proc_file
-                                        match_type = 'filename'
-                                        break
-                                    
-                                    # Check if CSV filename part is in processed filename
-                                    if (potential_filename in proc_filename or
-                                        potential_filename_no_ext in proc_filename_no_ext):
-                                        matched = proc_file
-                                        match_type = 'filename'
-                                        break
-                                
-                                if matched:
-                                    break
-                
-                # Try reverse: check if CSV value starts with any processed filename
-                if not matched:
-                    for key, value in row.items():
-                        if value:
-                            value_str = str(value).strip().lower()
-                            value_no_ext = os.path.splitext(value_str)[0]
-                            
-                            for proc_file in processed_files:
-                                proc_filename = proc_file['originalName'].lower()
-                                proc_filename_no_ext = os.path.splitext(proc_filename)[0].lower()
-                                
-                                # Check if CSV value starts with processed filename
-                                if (value_str.startswith(proc_filename) or 
-                                    value_str.startswith(proc_filename_no_ext) or
-                                    value_no_ext.startswith(proc_filename) or
-                                    value_no_ext.startswith(proc_filename_no_ext)):
-                                    matched = proc_file
-                                    match_type = 'filename'
-                                    break
-                            
-                            if matched:
-                                break
+            def generate_json():
+                # Match rows as they are read and send the matches in chunks;
+                # only the (encoded) unmatched rows are kept until the end
+                unmatched = []
+                matched_count = 0
+                value_matches = {}
+                error = None
+                chunk = ['{"matches":[']
+                try:
+                    for row in csv_rows:
+                        matched, match_type = match_csv_row(row, tables, value_matches)
+                        # Extra fields of a row longer than the header are only
+                        # matched, not sent (their None key cannot be encoded)
+                        row.pop(None, None)
+                        
+                        if matched:
+                            # Separator and entry are added together, so an
+                            # encoding error cannot leave a dangling comma
+                            chunk.append((',' if matched_count else '') + json_dumps({
+                                'csvRow': row,
+                                'matchedFile': matched,
+                                'matchType': match_type
+                            }))
+                            matched_count += 1
+                            if len(chunk) >= 2000:
+                                yield ''.join(chunk)
+                                chunk = []
+                        else:
+                            unmatched.append(json_dumps(row))
+                except Exception as e:
+                    # The status is already sent, so end the JSON with the error
+                    # and the rows matched so far
+                    error = f'Error processing CSV: {str(e)}'
                 
-                if matched:
-                    matches.append({
-                        'csvRow': row,
-                        'matchedFile': matched,
-                        'matchType': match_type
-                    })
-                else:
-                    unmatched.append(row)
+                chunk.append('],"unmatched":[')
+                chunk.append(','.join(unmatched))
+                chunk.append(
+                    f'],"totalCsvRows":{matched_count + len(unmatched)},'
+                    f'"matchedCount":{matched_count},"unmatchedCount":{len(unmatched)}'
+                )
+                if error is not None:
+                    chunk.append(',"error":' + json_dumps(error))
+                chunk.append('}')
+                yield ''.join(chunk)
             
-            return jsonify({
-                'matches': matches,
-                'unmatched': unmatched,
-                'totalCsvRows': len(csv_rows),
-                'matchedCount': len(matches),
-                'unmatchedCount': len(unmatched)
-            })
+            # The request context keeps the uploaded file open while streaming
+            return Response(stream_with_context(generate_json()), mimetype='application/json')
         
         except Exception as e:
             return jsonify({'error': f'Error processing CSV: {str(e)}'}), 500
@@ -935,67 +1055,35 @@ def register_routes(app):
             return jsonify({'error': 'No matches provided'}), 400
         
         try:
-            # Create workbook
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Matched Part Numbers"
-            
-            # Headers
-            ws['A1'] = 'ITEM NO.'
-            ws['B1'] = 'PART NUMBER'
-            ws['C1'] = 'QTY'
-            ws['D1'] = 'ORIGINAL FILENAME'
-            ws['E1'] = 'ORIGINAL PATH'
-            
-            # Style headers
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            header_font_color = Font(bold=True, color="FFFFFF")
-            
-            for col in ['A1', 'B1', 'C1', 'D1', 'E1']:
-                ws[col].font = header_font_color
-                ws[col].fill = header_fill
-            
-            # Add data
-            row = 2
-            item_no = 1
-            seen_part_numbers = set()
-            
+            # Unique part numbers only, in match order (first match of each)
+            unique_files = {}
             for match in matches:
                 matched_file = match['matchedFile']
-                part_number = matched_file['fullPartNumber']
-                
-                # Only add unique part numbers
-                if part_number not in seen_part_numbers:
-                    ws[f'A{row}'] = item_no
-                    ws[f'B{row}'] = part_number
-                    ws[f'C{row}'] = ''  # QTY left blank for manual entry
-                    ws[f'D{row}'] = matched_file['originalName']
-                    ws[f'E{row}'] = matched_file['originalPath']
-                    
-                    seen_part_numbers.add(part_number)
-                    row += 1
-                    item_no += 1
-            
-            # Auto-adjust column widths
-            ws.column_dimensions['A'].width = 12
-            ws.column_dimensions['B'].width = 15
-            ws.column_dimensions['C'].width = 10
-            ws.column_dimensions['D'].width = 30
-            ws.column_dimensions['E'].width = 50
+                unique_files.setdefault(matched_file['fullPartNumber'], matched_file)
+            # QTY left blank for manual entry
+            rows = (
+                (item_no, part_number, None, matched_file['originalName'], matched_file['originalPath'])
+                for item_no, (part_number, matched_file) in enumerate(unique_files.items(), 1)
+            )
             
             # Save to bytes
             output = io.BytesIO()
-            wb.save(output)
+            write_excel_table(
+                output,
+                "Matched Part Numbers",
+                [('ITEM NO.', 12), ('PART NUMBER', 15), ('QTY', 10), ('ORIGINAL FILENAME', 30), ('ORIGINAL PATH', 50)],
+                rows
+            )
             output.seek(0)
             
-            response = Response(
-                output.read(),
+            # Sent from the buffer itself, without copying it into a bytes object
+            return send_file(
+                output,
                 mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                headers={
-                    'Content-Disposition': 'attachment; filename=Matched_Part_Numbers.xlsx'
-                }
+                as_attachment=True,
+                download_name='Matched_Part_Numbers.xlsx',
+                conditional=True
             )
-            return response
         
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -1,4 +1,8 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 
 # Try to import SOLIDWORKS API (Windows only)
 try:
@@ -8,51 +12,169 @@ try:
 except ImportError:
     SOLIDWORKS_AVAILABLE = False
 
+# Document Manager document type of each native SOLIDWORKS extension
+DOC_TYPE_BY_EXTENSION = {
+    '.sldprt': 1,  # swDmDocumentPart
+    '.sldasm': 2,  # swDmDocumentAssembly
+    '.slddrw': 3   # swDmDocumentDrawing
+}
+
+# Custom properties of recently read files, reused while a file is unchanged
+# (file path -> ((mtime_ns, size), properties), least recently used first)
+PROPERTIES_CACHE_SIZE = 2048
+_properties_cache = {}
+_properties_cache_lock = threading.Lock()
+
+# Document Manager of the solidworks_session() open on each thread, if any
+_thread_state = threading.local()
+
+@contextmanager
+def solidworks_session():
+    """Keep COM initialized and one Document Manager open on this thread while the block runs"""
+    # Without a session every read or update initializes COM and dispatches
+    # a new Document Manager (a ProgID lookup) for its one file
+    if not SOLIDWORKS_AVAILABLE or getattr(_thread_state, 'sw_dm', None) is not None:
+        yield
+        return
+    
+    pythoncom.CoInitialize()
+    try:
+        try:
+            _thread_state.sw_dm = win32com.client.Dispatch("SwDocumentMgr.SwDMApplication")
+        except Exception as e:
+            # Each call then tries on its own and reports its error
+            print(f"Error opening SOLIDWORKS Document Manager: {e}")
+        yield
+    finally:
+        _thread_state.sw_dm = None
+        pythoncom.CoUninitialize()
+
+@contextmanager
+def _document_manager():
+    """Get the Document Manager of this thread's session, or one for a single call"""
+    sw_dm = getattr(_thread_state, 'sw_dm', None)
+    if sw_dm is not None:
+        yield sw_dm
+        return
+    
+    # Initialize COM for SOLIDWORKS Document Manager
+    pythoncom.CoInitialize()
+    try:
+        yield win32com.client.Dispatch("SwDocumentMgr.SwDMApplication")
+    finally:
+        pythoncom.CoUninitialize()
+
 def read_solidworks_properties(file_path):
     """Read custom properties from SOLIDWORKS file using Document Manager API"""
     if not SOLIDWORKS_AVAILABLE:
         return None
     
     try:
-        # Initialize COM for SOLIDWORKS Document Manager
-        pythoncom.CoInitialize()
-        sw_dm = win32com.client.Dispatch("SwDocumentMgr.SwDMApplication")
-        
-        # Get document type
-        doc_type = 1  # swDmDocumentPart = 1
-        if file_path.lower().endswith('.sldasm'):
-            doc_type = 2  # swDmDocumentAssembly
-        elif file_path.lower().endswith('.slddrw'):
-            doc_type = 3  # swDmDocumentDrawing
-        
-        # Open document
-        errors = []
-        sw_doc = sw_dm.GetDocument(file_path, doc_type, True, "", errors)
-        
-        if sw_doc is None:
-            return None
-        
-        # Read custom properties
-        properties = {}
-        custom_props = sw_doc.CustomPropertyManager("")
-        
-        if custom_props:
-            prop_names = custom_props.GetNames()
-            if prop_names:
-                for prop_name in prop_names:
-                    prop_value, resolved_value = custom_props.Get6(prop_name, False, "")
-                    properties[prop_name] = {
-                        'value': prop_value,
-                        'resolved': resolved_value
-                    }
-        
-        sw_doc.CloseDoc()
-        return properties
+        with _document_manager() as sw_dm:
+            # Get document type (other extensions are opened as parts)
+            doc_type = DOC_TYPE_BY_EXTENSION.get(os.path.splitext(file_path)[1].lower(), 1)
+            
+            # Open document
+            errors = []
+            sw_doc = sw_dm.GetDocument(file_path, doc_type, True, "", errors)
+            
+            if sw_doc is None:
+                return None
+            
+            # Read custom properties
+            properties = {}
+            custom_props = sw_doc.CustomPropertyManager("")
+            
+            if custom_props:
+                prop_names = custom_props.GetNames()
+                if prop_names:
+                    for prop_name in prop_names:
+                        prop_value, resolved_value = custom_props.Get6(prop_name, False, "")
+                        properties[prop_name] = {
+                            'value': prop_value,
+                            'resolved': resolved_value
+                        }
+            
+            sw_doc.CloseDoc()
+            return properties
     except Exception as e:
         print(f"Error reading SOLIDWORKS properties: {e}")
         return None
-    finally:
-        pythoncom.CoUninitialize()
+
+def _get_file_version(file_path):
+    """Get (mtime_ns, size) of a file, or None if it cannot be read"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def _get_cached_entry(file_path, version):
+    """Get the cache entry of a file if it was stored for this version, else None"""
+    with _properties_cache_lock:
+        entry = _properties_cache.pop(file_path, None)
+        if entry is not None and entry[0] == version:
+            # Most recently used last, so the oldest entry is evicted first
+            _properties_cache[file_path] = entry
+            return entry
+    return None
+
+def get_cached_solidworks_properties(file_path):
+    """Get the cached custom properties of a file if it is unchanged since they were read, else None (never opens the file)"""
+    if not SOLIDWORKS_AVAILABLE:
+        return None
+    
+    version = _get_file_version(file_path)
+    entry = _get_cached_entry(file_path, version) if version is not None else None
+    return entry[1] if entry is not None else None
+
+def read_solidworks_properties_cached(file_path):
+    """Read custom properties, reusing the last result while the file is unchanged"""
+    if not SOLIDWORKS_AVAILABLE:
+        return None
+    
+    version = _get_file_version(file_path)
+    if version is None:
+        return read_solidworks_properties(file_path)
+    
+    entry = _get_cached_entry(file_path, version)
+    if entry is not None:
+        return entry[1]
+    
+    properties = read_solidworks_properties(file_path)
+    # Failed reads (locked file, COM error) are not cached, so the next read retries
+    if properties is not None:
+        with _properties_cache_lock:
+            _properties_cache[file_path] = (version, properties)
+            if len(_properties_cache) > PROPERTIES_CACHE_SIZE:
+                del _properties_cache[next(iter(_properties_cache))]
+    return properties
+
+def forget_cached_properties(file_path):
+    """Drop the cached custom properties of a file"""
+    with _properties_cache_lock:
+        _properties_cache.pop(file_path, None)
+
+def read_solidworks_properties_batch(file_paths, cached=False):
+    """Read custom properties of several files on this thread, sharing one COM session"""
+    read = read_solidworks_properties_cached if cached else read_solidworks_properties
+    with solidworks_session():
+        return [read(file_path) for file_path in file_paths]
+
+def read_solidworks_properties_parallel(file_paths, cached=False):
+    """Read custom properties of several files in threads, returned in file_paths order"""
+    if not SOLIDWORKS_AVAILABLE or len(file_paths) < 2:
+        return read_solidworks_properties_batch(file_paths, cached)
+    
+    # Each read waits on file I/O, and each thread gets its own COM apartment;
+    # the files are split into one batch per thread so each thread opens its
+    # session once
+    workers = min(8, len(file_paths))
+    batch_size = -(-len(file_paths) // workers)
+    batches = [file_paths[i:i + batch_size] for i in range(0, len(file_paths), batch_size)]
+    with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+        results = executor.map(partial(read_solidworks_properties_batch, cached=cached), batches)
+        return [properties for batch in results for properties in batch]
 
 def update_solidworks_property(file_path, property_name, property_value):
     """Update custom property in SOLIDWORKS file"""
@@ -60,38 +182,30 @@ def update_solidworks_property(file_path, property_name, property_value):
         return False
     
     # Only update native SOLIDWORKS files, not export formats
-    solidworks_extensions = ['.sldprt', '.sldasm', '.slddrw']
-    file_ext = os.path.splitext(file_path)[1].lower()
-    if file_ext not in solidworks_extensions:
+    doc_type = DOC_TYPE_BY_EXTENSION.get(os.path.splitext(file_path)[1].lower())
+    if doc_type is None:
         # Export formats (.step, .x_t, etc.) cannot be updated via SOLIDWORKS API
         return False
     
     try:
-        pythoncom.CoInitialize()
-        sw_dm = win32com.client.Dispatch("SwDocumentMgr.SwDMApplication")
-        
-        doc_type = 1
-        if file_path.lower().endswith('.sldasm'):
-            doc_type = 2
-        elif file_path.lower().endswith('.slddrw'):
-            doc_type = 3
-        
-        errors = []
-        sw_doc = sw_dm.GetDocument(file_path, doc_type, True, "", errors)
-        
-        if sw_doc is None:
-            return False
-        
-        custom_props = sw_doc.CustomPropertyManager("")
-        if custom_props:
-            # Add or update the property
-            custom_props.Add3(property_name, 30, property_value)  # 30 = swCustomInfoText
-        
-        sw_doc.CloseDoc()
-        return True
+        with _document_manager() as sw_dm:
+            errors = []
+            sw_doc = sw_dm.GetDocument(file_path, doc_type, True, "", errors)
+            
+            if sw_doc is None:
+                return False
+            
+            custom_props = sw_doc.CustomPropertyManager("")
+            if custom_props:
+                # Add or update the property
+                custom_props.Add3(property_name, 30, property_value)  # 30 = swCustomInfoText
+            
+            sw_doc.CloseDoc()
+            # The file changed even if its mtime and size did not (same-length
+            # value within the timestamp resolution), so never reuse its old properties
+            forget_cached_properties(file_path)
+            return True
     except Exception as e:
         print(f"Error updating SOLIDWORKS property: {e}")
         return False
-    finally:
-        pythoncom.CoUninitialize()
 
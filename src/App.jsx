@@ -462,9 +462,7 @@ function App() {
   const handleExportMappings = async () => {
     try {
       const response = await fetch('http://localhost:5000/api/export-mappings')
-      const data = await response.json()
-
-      const blob = new Blob([data.csv], { type: 'text/csv' })
+      const blob = await response.blob()
       const url = window.URL.createObjectURL(blob)
       const a = document.createElement('a')
       a.href = url
@@ -683,6 +681,10 @@ function App() {
       }
 
       const data = await response.json()
+      // Errors after the response started streaming come in the body
+      if (data.error) {
+        throw new Error(data.error)
+      }
       setCsvMatches(data)
       setSuccess(
         `Found ${data.matchedCount} matches out of ${data.totalCsvRows} CSV entries`
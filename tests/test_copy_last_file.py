@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+from routes import copy_last_file
+
+class CopyLastFileTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.target = os.path.join(self.folder.name, '123456789001.sldprt')
+
+    def source(self, name, content):
+        path = os.path.join(self.folder.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def read_target(self):
+        with open(self.target) as f:
+            return f.read()
+
+    def test_last_file_wins(self):
+        sources = [self.source('first.sldprt', 'first'), self.source('second.sldprt', 'second')]
+        self.assertEqual(copy_last_file(sources, self.target), (1, []))
+        self.assertEqual(self.read_target(), 'second')
+
+    def test_falls_back_to_earlier_file_when_last_fails(self):
+        first = self.source('first.sldprt', 'first')
+        missing = os.path.join(self.folder.name, 'missing.sldprt')
+        copied_index, errors = copy_last_file([first, missing], self.target)
+        self.assertEqual(copied_index, 0)
+        self.assertEqual([source_path for source_path, _ in errors], [missing])
+        self.assertEqual(self.read_target(), 'first')
+
+    def test_nothing_copied(self):
+        missing = os.path.join(self.folder.name, 'missing.sldprt')
+        copied_index, errors = copy_last_file([missing], self.target)
+        self.assertIsNone(copied_index)
+        self.assertEqual(len(errors), 1)
+        self.assertFalse(os.path.exists(self.target))
+
+if __name__ == '__main__':
+    unittest.main()
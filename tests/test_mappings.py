@@ -0,0 +1,77 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import mappings
+from filename_generator import get_or_create_part_mapping
+
+class MappingsDbTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        cwd = os.getcwd()
+        os.chdir(folder.name)
+        self.addCleanup(os.chdir, cwd)
+        mappings._cache.update(signature=None, mappings=None)
+        self.addCleanup(mappings._cache.update, signature=None, mappings=None)
+
+    def write_legacy(self, text):
+        with open(mappings.MAPPINGS_FILE, 'w') as f:
+            f.write(text)
+
+    def test_failed_legacy_import_is_retried(self):
+        self.write_legacy('{"a.sldprt": {"base": "1234')
+        with self.assertRaises(ValueError):
+            mappings.load_mappings()
+        
+        self.write_legacy(json.dumps({'a.sldprt': {'base': '123456789', 'revision': 2}}))
+        self.assertEqual(mappings.load_mappings()['a.sldprt']['full'], '123456789002')
+
+    def test_unreadable_legacy_entries_are_skipped(self):
+        self.write_legacy(json.dumps({'a.sldprt': '12345678900X', 'b.sldprt': '123456789002'}))
+        self.assertEqual(list(mappings.load_mappings()), ['b.sldprt'])
+
+    def test_load_mappings_changes_do_not_leak(self):
+        loaded = mappings.load_mappings()
+        loaded['folder/a.sldprt'] = {'base': '123456789', 'revision': 1}
+        self.assertNotIn('folder/a.sldprt', mappings.load_mappings_readonly())
+        self.assertNotIn('folder/a.sldprt', mappings.load_mappings())
+
+    def test_save_replaces_cached_snapshot(self):
+        loaded = mappings.load_mappings()
+        loaded['folder/a.sldprt'] = {'base': '123456789', 'revision': 1}
+        before_save = mappings.load_mappings_readonly()
+        mappings.save_mappings(loaded)
+        
+        # Readers of the old snapshot do not see the save, new readers do
+        self.assertNotIn('folder/a.sldprt', before_save)
+        self.assertEqual(mappings.load_mappings_readonly()['folder/a.sldprt']['full'], '123456789001')
+        
+        # Changing the saved mappings afterwards does not change the cache
+        loaded['folder/b.sldprt'] = {'base': '987654321', 'revision': 1}
+        get_or_create_part_mapping('folder/a.sldprt', loaded, revision=2)
+        cached = mappings.load_mappings_readonly()
+        self.assertNotIn('folder/b.sldprt', cached)
+        self.assertEqual(cached['folder/a.sldprt']['revision'], 1)
+        self.assertEqual(cached.paths_for_part_number('123456789001'), ('folder/a.sldprt',))
+
+    def test_save_writes_only_changes_and_reloads_after_outside_writes(self):
+        loaded = mappings.load_mappings()
+        loaded['folder/a.sldprt'] = {'base': '123456789', 'revision': 1}
+        mappings.save_mappings(loaded)
+        
+        # Another process writing the database invalidates the cache
+        with sqlite3.connect(mappings.MAPPINGS_DB) as conn:
+            conn.execute("INSERT INTO mappings VALUES ('folder/b.sldprt', '987654321', 4)")
+        conn.close()
+        self.assertEqual(mappings.load_mappings_readonly()['folder/b.sldprt']['full'], '987654321004')
+        
+        # Saving a copy loaded earlier keeps the row written in between
+        loaded['folder/c.sldprt'] = {'base': '111111111', 'revision': 1}
+        mappings.save_mappings(loaded)
+        self.assertEqual(sorted(mappings.load_mappings()), ['folder/a.sldprt', 'folder/b.sldprt', 'folder/c.sldprt'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import random
+import re
+import unittest
+
+from mappings import Mappings
+from routes import build_match_tables, match_csv_row
+
+def reference_match(row, mappings):
+    """The original stage-by-stage match_csv cascade, kept as the expected behavior"""
+    processed_files = [
+        {
+            'originalPath': file_path,
+            'originalName': os.path.basename(file_path),
+            'basePartNumber': mapping['base'],
+            'revision': mapping['revision'],
+            'fullPartNumber': mapping['full']
+        }
+        for file_path, mapping in mappings.items()
+    ]
+    by_full_part = {f['fullPartNumber']: f for f in processed_files}
+    by_base_part = {f['basePartNumber']: f for f in processed_files}
+    by_filename = {f['originalName'].lower(): f for f in processed_files}
+    by_filename_no_ext = {}
+    for f in processed_files:
+        by_filename_no_ext.setdefault(os.path.splitext(f['originalName'])[0].lower(), f)
+    values = [str(value).strip() for value in row.values() if value]
+
+    for value_str in values:
+        match = re.search(r'\d{12}', value_str)
+        if match and match.group() in by_full_part:
+            return by_full_part[match.group()], 'fullPartNumber'
+    for value_str in values:
+        match = re.search(r'\d{9}', value_str)
+        if match and match.group() in by_base_part:
+            return by_base_part[match.group()], 'basePartNumber'
+    for value_str in values:
+        if value_str.lower() in by_filename:
+            return by_filename[value_str.lower()], 'filename'
+    for value_str in values:
+        value_no_ext = os.path.splitext(value_str.lower())[0]
+        if value_no_ext in by_filename_no_ext:
+            return by_filename_no_ext[value_no_ext], 'filename'
+    for value_str in values:
+        parts = value_str.split()
+        if not parts:
+            continue
+        potential_filename = parts[0].lower()
+        potential_filename_no_ext = os.path.splitext(potential_filename)[0]
+        if potential_filename in by_filename:
+            return by_filename[potential_filename], 'filename'
+        if potential_filename_no_ext in by_filename_no_ext:
+            return by_filename_no_ext[potential_filename_no_ext], 'filename'
+        for proc_file in processed_files:
+            proc_filename = proc_file['originalName'].lower()
+            proc_filename_no_ext = os.path.splitext(proc_filename)[0]
+            if (potential_filename == proc_filename or
+                potential_filename_no_ext == proc_filename_no_ext or
+                potential_filename == proc_filename_no_ext or
+                potential_filename_no_ext == proc_filename or
+                proc_filename.startswith(potential_filename) or
+                proc_filename_no_ext.startswith(potential_filename_no_ext) or
+                potential_filename in proc_filename or
+                potential_filename_no_ext in proc_filename_no_ext):
+                return proc_file, 'filename'
+    for value_str in values:
+        value_str = value_str.lower()
+        value_no_ext = os.path.splitext(value_str)[0]
+        for proc_file in processed_files:
+            proc_filename = proc_file['originalName'].lower()
+            proc_filename_no_ext = os.path.splitext(proc_filename)[0]
+            if (value_str.startswith(proc_filename) or
+                value_str.startswith(proc_filename_no_ext) or
+                value_no_ext.startswith(proc_filename) or
+                value_no_ext.startswith(proc_filename_no_ext)):
+                return proc_file, 'filename'
+    return None, None
+
+class MatchCsvRowTest(unittest.TestCase):
+    NAME_PARTS = ['a', 'B', 'ab', 'A-1', '.', '.x', 'bA']
+    BASES = ['123456789', '987654321', '000000001']
+
+    def random_mappings(self, rng):
+        mappings = Mappings()
+        for index in range(rng.randint(1, 8)):
+            name = ''.join(rng.choice(self.NAME_PARTS) for _ in range(rng.randint(1, 3)))
+            extension = rng.choice(['', '.sldprt', '.STEP'])
+            mappings[f'folder{index % 3}/{name}{extension}'] = {
+                'base': rng.choice(self.BASES),
+                'revision': rng.randint(1, 3)
+            }
+        return mappings
+
+    def random_value(self, rng):
+        kind = rng.randrange(4)
+        if kind == 0:
+            return ''
+        if kind == 1:
+            return rng.choice(['x', 'PN ', '']) + rng.choice(self.BASES) + f'{rng.randint(1, 4):03d}' + rng.choice(['', '7', ' qty'])
+        words = [''.join(rng.choice(self.NAME_PARTS) for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(1, 3))]
+        return rng.choice(['', ' ']) + ' '.join(words) + rng.choice(['', '.sldprt', '.step', ' '])
+
+    def test_matches_reference_cascade(self):
+        rng = random.Random(1234)
+        for _ in range(300):
+            mappings = self.random_mappings(rng)
+            tables = build_match_tables(mappings)
+            # One value memo per table set, as match_csv keeps one per upload
+            value_matches = {}
+            for _ in range(20):
+                row = {f'col{column}': self.random_value(rng) for column in range(rng.randint(1, 4))}
+                matched, match_type = match_csv_row(row, tables, value_matches)
+                expected, expected_type = reference_match(row, mappings)
+                self.assertEqual(
+                    (matched and matched['originalPath'], match_type),
+                    (expected and expected['originalPath'], expected_type),
+                    (row, list(mappings))
+                )
+
+    def test_full_part_number_wins_over_earlier_filename(self):
+        mappings = Mappings()
+        mappings['folder/bracket.sldprt'] = {'base': '111111111', 'revision': 1}
+        mappings['folder/plate.sldprt'] = {'base': '222222222', 'revision': 2}
+        row = {'name': 'bracket.sldprt', 'part': 'PN 222222222002'}
+        matched, match_type = match_csv_row(row, build_match_tables(mappings), {})
+        self.assertEqual((matched['originalPath'], match_type), ('folder/plate.sldprt', 'fullPartNumber'))
+
+if __name__ == '__main__':
+    unittest.main()
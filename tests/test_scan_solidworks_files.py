@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from routes import scan_solidworks_files
+
+class ScanSolidworksFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        for relative_path in ('a.sldprt', 'notes.txt', 'ok/b.sldprt', 'locked/c.sldprt'):
+            path = os.path.join(self.folder.name, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'w').close()
+
+    def scanned_paths(self, include_subdirectories):
+        return sorted(
+            os.path.relpath(entry.path, self.folder.name).replace(os.sep, '/')
+            for entry in scan_solidworks_files(self.folder.name, include_subdirectories)
+        )
+
+    def test_top_level_only(self):
+        self.assertEqual(self.scanned_paths(False), ['a.sldprt'])
+
+    def test_unreadable_subfolder_is_skipped(self):
+        scandir = os.scandir
+
+        def denying_scandir(path):
+            if os.path.basename(path) == 'locked':
+                raise PermissionError(13, 'Permission denied', path)
+            return scandir(path)
+
+        with mock.patch('routes.os.scandir', denying_scandir):
+            self.assertEqual(self.scanned_paths(True), ['a.sldprt', 'ok/b.sldprt'])
+
+if __name__ == '__main__':
+    unittest.main()